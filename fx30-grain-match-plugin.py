@@ -8,11 +8,25 @@ bl_info = {
     "category": "Node",
 }
 
+import functools
+
 import bpy
 import numpy as np
 from bpy.types import Node, NodeSocket, NodeTree, PropertyGroup
 from bpy.props import FloatProperty, EnumProperty, PointerProperty, StringProperty, BoolProperty
 
+# Numba is optional; Blender doesn't bundle it, so fall back to plain NumPy without it
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# CuPy is optional as well; GPU generation falls back to the CPU path when it's missing
+try:
+    import cupy as cp
+except ImportError:
+    cp = None
+
 # Define the ISO presets for FX30
 ISO_PRESETS = [
     ("80", "ISO 80", "Sony FX30 ISO 80 grain structure"),
@@ -59,6 +73,51 @@ GRAIN_PARAMETERS = {
     "102400": (2.30, 0.96, 0.98, 0.55, 0.38, 0.52),
 }
 
+# Log2(ISO) lookup table built from the presets above, so any ISO value can be
+# interpolated between its neighbouring presets (rows follow the same format)
+_ISO_LOG = np.log2(np.array([float(iso) for iso in GRAIN_PARAMETERS], dtype=np.float32))
+_ISO_PARAMS = np.array(list(GRAIN_PARAMETERS.values()), dtype=np.float32)
+
+def _channel_scales(parameters):
+    intensity, size, roughness, color_influence, luma_influence, chroma_bias = parameters
+    
+    # Luminance noise is mostly monochromatic; color noise appears more at higher ISOs.
+    # Ordered R, G, B, luma to match the RGBA grain buffer
+    chroma = intensity * (1 - luma_influence) * color_influence
+    scales = np.array([chroma * 1.2, chroma * 0.8, chroma * 1.4, intensity * luma_influence], dtype=np.float32)
+    scales.flags.writeable = False
+    return scales
+
+# Final per-channel noise scales for each preset, computed once instead of per frame
+_GRAIN_SCALES = {iso: _channel_scales(params) for iso, params in GRAIN_PARAMETERS.items()}
+
+# Tile edge length used when generating grain region by region
+COMPOSITOR_TILE_SIZE = 256
+
+# Number of noise octaves stacked to build spatially correlated grain (1 = plain white noise)
+GRAIN_OCTAVES = 3
+
+# Smallest lattice cell (in pixels) worth an octave; finer lattices cost roughly one
+# hashed node per pixel but add almost no visible correlation over the white noise
+MIN_OCTAVE_CELL = 2.0
+
+# Below this color-noise scale (intensity * (1 - luma_influence) * color_influence) the
+# R/G/B noise is visually negligible and isn't generated at all. Tunable: raise it to
+# skip color noise at more ISOs, set it to 0 to always generate it
+CHROMA_NOISE_THRESHOLD = 1e-3
+
+# Storage type for cached grain. Samples are drawn and shaped in float32, then kept in
+# the caches as float16 (plenty for a visual effect, half the memory). This is internal:
+# pattern dicts always hand out float32, whichever path produced them, so every cache
+# hit still pays one full-frame float16 -> float32 widening pass (a fresh copy)
+GRAIN_STORAGE_DTYPE = np.float16
+
+# Width (in 0-1 luminance) of the shadow/highlight masks used to modulate luma grain
+TONAL_MASK_SIGMA = 0.25
+
+# Number of pre-drawn Gaussian samples used by the fast preview path (power of two)
+GAUSSIAN_POOL_SIZE = 1 << 20
+
 # Camera-specific ISO settings
 class FX30GrainCameraSettings(PropertyGroup):
     iso: EnumProperty(
@@ -96,35 +155,353 @@ class FX30GrainCameraSettings(PropertyGroup):
 def register_camera_property():
     bpy.types.Camera.fx30_grain = PointerProperty(type=FX30GrainCameraSettings)
 
+# Fused grain kernel: draws and scales all four channels in one parallel pass over rows.
+# It uses Numba's own Mersenne Twister, so for the same seed its white noise differs from
+# the NumPy Generator path. It is therefore opt-in (use_numba) rather than picked up
+# whenever numba imports, keeping the default grain identical on every machine.
+# cache=True keeps the compiled kernel on disk so later sessions don't recompile it
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _gen_pattern_numba(out_luma, out_r, out_g, out_b, H, W, seed, s_luma, s_r, s_g, s_b):
+        for row in prange(H):
+            # Numba's PRNG state is thread-local, so seeding per row keeps the output reproducible.
+            # Each seed owns a block of 2**20 row seeds, so seed + 1 isn't just seed shifted a row
+            np.random.seed((seed * 1048576 + row) % 4294967296)
+            for col in range(W):
+                out_r[row, col] = np.random.standard_normal() * s_r
+                out_g[row, col] = np.random.standard_normal() * s_g
+                out_b[row, col] = np.random.standard_normal() * s_b
+                out_luma[row, col] = np.random.standard_normal() * s_luma
+else:
+    _gen_pattern_numba = None
+
+# Pre-drawn Gaussian samples reused by the fast preview path. The pool is large
+# compared to what the eye picks up as repetition in fine grain, and small enough
+# to stay resident in L3 cache (4 MB as float32)
+@functools.lru_cache(maxsize=4)
+def _gaussian_pool(seed):
+    pool = np.random.default_rng(seed).standard_normal(GAUSSIAN_POOL_SIZE, dtype=np.float32)
+    pool.flags.writeable = False
+    return pool
+
+def _fill_from_pool(pool, offset, out):
+    # Copy the pool into a flat output starting at offset, wrapping around as needed
+    n = out.size
+    head = min(n, pool.size - offset)
+    out[:head] = pool[offset:offset + head]
+    pos = head
+    while pos < n:
+        step = min(pool.size, n - pos)
+        out[pos:pos + step] = pool[:step]
+        pos += step
+
+# Fractal (FBM-style) grain structure. The per-pixel white noise is the finest octave;
+# each further octave is value noise on a lattice twice as coarse (lacunarity 0.5 in
+# frequency, starting from 1/size) and weighted by roughness**octave
+def _grain_octaves(size, roughness):
+    # Octaves with a lattice near pixel size barely differ from the white noise, so skip them
+    octaves = [(octave, size * 2 ** octave, roughness ** octave) for octave in range(1, GRAIN_OCTAVES)]
+    octaves = [(octave, cell, amp) for octave, cell, amp in octaves if cell >= MIN_OCTAVE_CELL]
+    
+    # Bilinear value noise keeps ~4/9 of its lattice variance; normalise the stack to unit variance
+    norm = 1 / np.sqrt(1 + sum(amp * amp for octave, cell, amp in octaves) * 4 / 9)
+    return octaves, np.float32(norm)
+
+def _splitmix64(x, xp=np):
+    # SplitMix64 finaliser on uint64 arrays (wrapping arithmetic)
+    x = x + xp.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> xp.uint64(30))) * xp.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> xp.uint64(27))) * xp.uint64(0x94D049BB133111EB)
+    return x ^ (x >> xp.uint64(31))
+
+def _lattice_normals(seed, octave, rows, cols, channels, xp=np):
+    # Counter-based lattice: the N(0, 1) value at (row, col, channel) is a pure hash of
+    # (seed, octave, row, col, channel), so any region of any frame or tile agrees on it.
+    # (row, col, channel) is packed into one 64-bit index (24 + 24 + 16 bits) and hashed
+    # once, XORed with a per-(seed, octave) key
+    base = _splitmix64(xp.full(1, (seed << 8 | octave) & 0xFFFFFFFFFFFFFFFF, dtype=xp.uint64), xp)
+    index = (rows.astype(xp.uint64) << xp.uint64(40))[:, None, None] | (cols.astype(xp.uint64) << xp.uint64(16))[None, :, None]
+    key = _splitmix64((index | channels.astype(xp.uint64)[None, None, :]) ^ base, xp)
+    
+    # Sum the hash's four 16-bit words: mean 2 * 0xFFFF, variance 4 * (2**32 - 1) / 12.
+    # Centred and scaled this is unit-variance and close enough to Gaussian for value
+    # noise, without Box-Muller's log/sqrt/cos
+    total = key & xp.uint64(0xFFFF)
+    for shift in (16, 32, 48):
+        total += (key >> xp.uint64(shift)) & xp.uint64(0xFFFF)
+    return (total.astype(xp.float32) - xp.float32(2 * 0xFFFF)) * xp.float32(1 / np.sqrt((2 ** 32 - 1) / 3))
+
+def _add_grain_octaves(buf, seed, octaves, scales, origin=(0, 0), first_channel=0, xp=np):
+    # Accumulate the coarse octaves into an already scaled (H, W, C) buffer whose top-left
+    # pixel sits at origin (y, x) in the frame and whose channels start at first_channel.
+    # Lattice coordinates are absolute, so tiles sharing an edge interpolate the same values
+    height, width, channels = buf.shape
+    if not octaves or height == 0 or width == 0:
+        return
+    
+    # Two frame-sized scratch buffers are reused by every octave rather than allocating
+    # fresh temporaries per interpolation step
+    octave_noise = xp.empty_like(buf)
+    upper = xp.empty_like(buf)
+    take_mode = {'mode': 'clip'} if xp is np else {}
+    
+    for octave, cell, amp in octaves:
+        ys = (xp.arange(height, dtype=xp.float32) + xp.float32(origin[0])) / xp.float32(cell)
+        xs = (xp.arange(width, dtype=xp.float32) + xp.float32(origin[1])) / xp.float32(cell)
+        y0, x0 = xp.floor(ys), xp.floor(xs)
+        fy, fx = (ys - y0)[:, None, None], (xs - x0)[:, None]
+        y0, x0 = y0.astype(xp.intp), x0.astype(xp.intp)
+        
+        # Only the lattice cells this buffer touches, indexed relative to its first cell
+        row0, col0 = int(y0[0]), int(x0[0])
+        lattice = _lattice_normals(
+            seed, octave,
+            xp.arange(row0, int(y0[-1]) + 2),
+            xp.arange(col0, int(x0[-1]) + 2),
+            xp.arange(first_channel, first_channel + channels),
+            xp,
+        )
+        y0 -= row0
+        x0 -= col0
+        
+        # Scale on the (small) lattice rather than on the full-size interpolated octave
+        lattice *= scales * xp.float32(amp)
+        
+        # Separable bilinear interpolation: rows first (on the narrow lattice), then columns,
+        # accumulating left + (right - left) * fx straight into buf
+        rows = lattice[y0]
+        rows += (lattice[y0 + 1] - rows) * fy
+        xp.take(rows, x0, axis=1, out=octave_noise, **take_mode)
+        xp.take(rows, x0 + 1, axis=1, out=upper, **take_mode)
+        xp.subtract(upper, octave_noise, out=upper)
+        xp.multiply(upper, fx, out=upper)
+        xp.add(buf, octave_noise, out=buf)
+        xp.add(buf, upper, out=buf)
+
+def _fill_luma_only(buf, rng, seed, octaves, scales, origin=(0, 0), xp=np):
+    # Zero the R/G/B channels of an (H, W, 4) buffer and only draw luma noise into A
+    buf[..., :3] = 0
+    xp.multiply(rng.standard_normal(buf.shape[:2], dtype=xp.float32), scales[3], out=buf[..., 3])
+    _add_grain_octaves(buf[..., 3:], seed, octaves, scales[3:], origin, first_channel=3, xp=xp)
+
 # FX30 Grain Pattern Generator
 class FX30GrainPattern:
-    def __init__(self, iso="800", seed=1):
+    def __init__(self, iso="800", seed=1, use_gpu=False, preview=False, use_numba=False):
         self.iso = iso
-        self.seed = seed
-        self.parameters = GRAIN_PARAMETERS.get(iso, GRAIN_PARAMETERS["800"])
+        self.seed = int(seed)
+        self.use_gpu = use_gpu and cp is not None
+        self.preview = preview
+        self.use_numba = use_numba and _gen_pattern_numba is not None
+        # Unparseable, non-finite or non-positive ISOs fall back to ISO 800
+        try:
+            iso_value = float(iso)
+        except (TypeError, ValueError):
+            iso_value = 800.0
+        if not (np.isfinite(iso_value) and iso_value > 0):
+            iso_value = 800.0
+        # Parameters stay float32 so the scaling passes don't upcast the grain buffers
+        self.parameters = self._lookup(iso_value)
+        # Presets use the precomputed scales; interpolated ISOs derive them from the parameters
+        self.scales = _GRAIN_SCALES.get(iso)
+        if self.scales is None:
+            self.scales = _channel_scales(self.parameters)
         
-    def generate_pattern(self, width, height):
-        np.random.seed(self.seed)
+        # PCG64 generator; the initial state is kept so every call reproduces the same pattern
+        self._rng = np.random.default_rng(self.seed)
+        self._rng_state = self._rng.bit_generator.state
+        
+    @staticmethod
+    def _lookup(iso):
+        # Linear interpolation in log2(ISO) between adjacent presets, clamped to the preset range
+        log_iso = np.log2(np.float32(iso))
+        i = min(max(int(np.searchsorted(_ISO_LOG, log_iso, side="right")), 1), len(_ISO_LOG) - 1)
+        t = np.clip((log_iso - _ISO_LOG[i - 1]) / (_ISO_LOG[i] - _ISO_LOG[i - 1]), 0, 1)
+        return tuple(_ISO_PARAMS[i - 1] + (_ISO_PARAMS[i] - _ISO_PARAMS[i - 1]) * t)
+        
+    def _chroma_negligible(self):
+        intensity, size, roughness, color_influence, luma_influence, chroma_bias = self.parameters
+        return intensity * (1 - luma_influence) * color_influence < CHROMA_NOISE_THRESHOLD
+        
+    def _render_channels(self, width, height):
+        intensity, size, roughness, color_influence, luma_influence, chroma_bias = self.parameters
+        
+        # R/G/B color noise and luma noise (in A) share one contiguous (H, W, 4) float32
+        # buffer laid out like a compositor color image; the grain is a visual effect,
+        # so double precision only wastes bandwidth
+        buf = np.empty((height, width, 4), dtype=np.float32)
+        
+        octaves, norm = _grain_octaves(size, roughness)
+        scales = self.scales * norm
+        
+        if self.preview:
+            # Preview: copy the white noise out of the cache-resident sample pool, each channel
+            # at its own offset through a strided view (so each gets the pool's full period),
+            # then shape it with the same octaves and low-ISO chroma skip as the full render
+            pool = _gaussian_pool(self.seed)
+            flat = buf.reshape(-1)
+            first = 3 if self._chroma_negligible() else 0
+            buf[..., :first] = 0
+            for channel in range(first, 4):
+                offset = hash((channel, self.seed)) & (GAUSSIAN_POOL_SIZE - 1)
+                _fill_from_pool(pool, offset, flat[channel::4])
+            
+            np.multiply(buf[..., first:], scales[first:], out=buf[..., first:])
+            _add_grain_octaves(buf[..., first:], self.seed, octaves, scales[first:], first_channel=first)
+            return buf
         
+        rng = self._rng
+        rng.bit_generator.state = self._rng_state
+        
+        if self._chroma_negligible():
+            # Low ISO: skip three of the four noise passes
+            _fill_luma_only(buf, rng, self.seed, octaves, scales)
+            return buf
+        
+        if self.use_numba:
+            s_r, s_g, s_b, s_luma = scales
+            _gen_pattern_numba(buf[..., 3], buf[..., 0], buf[..., 1], buf[..., 2], height, width, self.seed, s_luma, s_r, s_g, s_b)
+        else:
+            rng.standard_normal(dtype=np.float32, out=buf)
+            # One broadcast pass over the whole buffer instead of one sweep per channel
+            np.multiply(buf, scales, out=buf)
+        
+        _add_grain_octaves(buf, self.seed, octaves, scales)
+        return buf
+        
+    def _render_channels_gpu(self, width, height):
+        # Same layout as the CPU path, but drawn and scaled on the device (returns cupy arrays)
         intensity, size, roughness, color_influence, luma_influence, chroma_bias = self.parameters
+        octaves, norm = _grain_octaves(size, roughness)
+        scales = cp.asarray(self.scales * norm)
         
-        # Generate base luminance noise (mostly monochromatic)
-        luma_noise = np.random.normal(0, 1, (height, width))
+        rng = cp.random.default_rng(self.seed)
+        if self._chroma_negligible():
+            buf = cp.empty((height, width, 4), dtype=cp.float32)
+            _fill_luma_only(buf, rng, self.seed, octaves, scales, xp=cp)
+            return buf
         
-        # Generate color noise components (appears more at higher ISOs)
-        r_noise = np.random.normal(0, 1, (height, width)) * color_influence * 1.2
-        g_noise = np.random.normal(0, 1, (height, width)) * color_influence * 0.8
-        b_noise = np.random.normal(0, 1, (height, width)) * color_influence * 1.4
+        buf = rng.standard_normal((height, width, 4), dtype=cp.float32)
+        buf *= scales
+        
+        _add_grain_octaves(buf, self.seed, octaves, scales, xp=cp)
+        return buf
+        
+    def _pattern_dict(self, rgba):
+        # Cached float16 grain is widened to float32 once here; float32 buffers pass through
+        # uncopied. Per-channel entries are views into the RGBA buffer, not copies
+        intensity, size, roughness, color_influence, luma_influence, chroma_bias = self.parameters
+        rgba = rgba.astype(np.float32, copy=False)
         
         return {
-            'luma': luma_noise * intensity * luma_influence,
-            'red': r_noise * intensity * (1 - luma_influence),
-            'green': g_noise * intensity * (1 - luma_influence),
-            'blue': b_noise * intensity * (1 - luma_influence),
+            'rgba': rgba,
+            'luma': rgba[..., 3],
+            'red': rgba[..., 0],
+            'green': rgba[..., 1],
+            'blue': rgba[..., 2],
             'size': size,
             'roughness': roughness,
             'chroma_bias': chroma_bias
         }
+        
+    def generate_pattern(self, width, height):
+        if self.use_gpu:
+            rgba = self._render_channels_gpu(width, height)
+        else:
+            # A cache hit skips generation; the float16 entry is widened into a fresh,
+            # writable float32 copy by _pattern_dict, so callers may modify the result
+            rgba = _cached_pattern(self.iso, self.seed, width, height, self.preview, self.use_numba)
+        
+        return self._pattern_dict(rgba)
+
+    def generate_tile(self, x0, y0, tile_width, tile_height):
+        # Each tile's white noise comes from its own stream keyed on (seed, tile origin), and
+        # the coarse octaves from the shared absolute lattice, so tiles are deterministic
+        # regardless of render order, stitch seamlessly, and only one is held in memory
+        intensity, size, roughness, color_influence, luma_influence, chroma_bias = self.parameters
+        octaves, norm = _grain_octaves(size, roughness)
+        scales = self.scales * norm
+        
+        rng = np.random.default_rng((self.seed, y0, x0))
+        buf = np.empty((tile_height, tile_width, 4), dtype=np.float32)
+        
+        if self._chroma_negligible():
+            _fill_luma_only(buf, rng, self.seed, octaves, scales, origin=(y0, x0))
+        else:
+            rng.standard_normal(dtype=np.float32, out=buf)
+            # Scale all four channels in a single broadcast pass
+            np.multiply(buf, scales, out=buf)
+            _add_grain_octaves(buf, self.seed, octaves, scales, origin=(y0, x0))
+        
+        return self._pattern_dict(buf)
+        
+    def generate_patterns(self, width, height, n_frames):
+        # Yield one pattern dict per frame for animation previews; frame k is bit-identical
+        # to generate_pattern() with seed + k. Frames go through the single-frame pattern
+        # cache, so only one frame is generated at a time and scrubbing back over the last
+        # few frames is free. Always generated on the CPU (use_gpu is ignored); preview is honoured
+        for k in range(n_frames):
+            yield self._pattern_dict(_cached_pattern(self.iso, self.seed + k, width, height, self.preview, self.use_numba))
+        
+    def iter_tiles(self, width, height, tile_size=COMPOSITOR_TILE_SIZE):
+        # Yield (x0, y0, tile) over the frame, matching the compositor's tile layout
+        for y0 in range(0, height, tile_size):
+            for x0 in range(0, width, tile_size):
+                tile_width = min(tile_size, width - x0)
+                tile_height = min(tile_size, height - y0)
+                yield x0, y0, self.generate_tile(x0, y0, tile_width, tile_height)
+
+# Grain only depends on ISO, seed and resolution, so unchanged frames reuse it instead of
+# regenerating it (hits still cost the float16 -> float32 widening in _pattern_dict)
+@functools.lru_cache(maxsize=8)
+def _cached_pattern(iso, seed, width, height, preview=False, use_numba=False):
+    buf = FX30GrainPattern(iso, seed, preview=preview, use_numba=use_numba)._render_channels(width, height).astype(GRAIN_STORAGE_DTYPE, copy=False)
+    buf.flags.writeable = False
+    return buf
+
+def _array_module(array):
+    # cupy for device arrays from the GPU path, numpy otherwise
+    return cp.get_array_module(array) if cp is not None else np
+
+# Unnormalised Gaussian bell exp(-(x - mu)^2 / (2 sigma^2)), computed in place into out
+def _gaussian_pdf_inplace(x, mu, sigma, out, xp=np):
+    xp.subtract(x, mu, out=out)
+    xp.square(out, out=out)
+    xp.multiply(out, -0.5 / sigma ** 2, out=out)
+    xp.exp(out, out=out)
+    return out
+
+def _tonal_grain_weight(luminance, shadow_boost, highlight_suppress, out=None, xp=np):
+    # Per-pixel grain gain: boosted around black, reduced around white (FX30 characteristic)
+    if out is None:
+        out = xp.empty(luminance.shape, dtype=xp.float32)
+    highlights = xp.empty_like(out)
+    
+    _gaussian_pdf_inplace(luminance, 0.0, TONAL_MASK_SIGMA, out, xp=xp)
+    xp.multiply(out, shadow_boost - 1, out=out)
+    _gaussian_pdf_inplace(luminance, 1.0, TONAL_MASK_SIGMA, highlights, xp=xp)
+    xp.multiply(highlights, 1 - highlight_suppress, out=highlights)
+    xp.subtract(out, highlights, out=out)
+    xp.add(out, 1, out=out)
+    return out
+
+# Camera Override items, rebuilt only after a depsgraph update (or when the object count
+# changes) instead of walking bpy.data.objects on every redraw. Holding the list here also
+# keeps the item strings alive, as Blender requires for dynamic enums
+_camera_items_cache = []
+_camera_items_stamp = -1
+
+def _camera_items():
+    global _camera_items_cache, _camera_items_stamp
+    stamp = len(bpy.data.objects)
+    if stamp != _camera_items_stamp:
+        _camera_items_cache = [(obj.name, obj.name, "") for obj in bpy.data.objects if obj.type == 'CAMERA'] + [("NONE", "Active Camera", "")]
+        _camera_items_stamp = stamp
+    return _camera_items_cache
+
+@bpy.app.handlers.persistent
+def _invalidate_camera_items(scene, depsgraph=None):
+    global _camera_items_stamp
+    _camera_items_stamp = -1
 
 # Node for the compositor
 class FX30GrainMatchNode(Node):
@@ -135,7 +512,7 @@ class FX30GrainMatchNode(Node):
     camera_override: EnumProperty(
         name="Camera Override",
         description="Select which camera's settings to use (or None for active camera)",
-        items=lambda self, context: [(obj.name, obj.name, "") for obj in bpy.data.objects if obj.type == 'CAMERA'] + [("NONE", "Active Camera", "")],
+        items=lambda self, context: _camera_items(),
         default="NONE"
     )
     
@@ -176,6 +553,24 @@ class FX30GrainMatchNode(Node):
         max=1.0
     )
     
+    fast_preview: BoolProperty(
+        name="Fast Preview",
+        description="Reuse a precomputed pool of grain samples instead of drawing fresh noise every pixel",
+        default=False
+    )
+    
+    use_numba: BoolProperty(
+        name="Use Numba",
+        description="Generate grain with the Numba kernel if numba is installed (faster, but the grain differs from the default generator)",
+        default=False
+    )
+    
+    use_gpu: BoolProperty(
+        name="Use GPU",
+        description="Generate grain on the GPU with CuPy (falls back to CPU if CuPy is not installed)",
+        default=False
+    )
+    
     def init(self, context):
         # Input for the image to add grain to
         self.inputs.new('NodeSocketColor', "Image")
@@ -200,6 +595,24 @@ class FX30GrainMatchNode(Node):
         col = layout.column(heading="Advanced")
         col.prop(self, "shadow_boost")
         col.prop(self, "highlight_suppress")
+        col.prop(self, "fast_preview")
+        col.prop(self, "use_numba")
+        col.prop(self, "use_gpu")
+    
+    def grain_outputs(self, grain):
+        # Zero-copy views into the RGBA grain buffer for the matching output sockets
+        rgba = grain['rgba']
+        return {
+            "Color Noise": rgba[..., :3],
+            "Luma Noise": rgba[..., 3],
+        }
+    
+    def apply_tonal_response(self, luma_noise, luminance):
+        # Modulate luma grain by scene luminance using the node's shadow/highlight controls;
+        # works on host (numpy) and device (cupy) grain alike, as long as both inputs match
+        xp = _array_module(luma_noise)
+        weight = _tonal_grain_weight(luminance, self.shadow_boost, self.highlight_suppress, xp=xp)
+        return xp.multiply(luma_noise, weight, out=weight)
     
     def update(self):
         pass
@@ -269,14 +682,19 @@ def register():
     bpy.utils.register_class(FX30GrainMatchGroup)
     bpy.utils.register_class(FX30GrainCameraPanel)
     bpy.types.NODE_MT_add.append(add_node_to_menu)
+    bpy.app.handlers.depsgraph_update_post.append(_invalidate_camera_items)
 
 def unregister():
+    if _invalidate_camera_items in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_invalidate_camera_items)
     bpy.types.NODE_MT_add.remove(add_node_to_menu)
     bpy.utils.unregister_class(FX30GrainCameraPanel)
     bpy.utils.unregister_class(FX30GrainMatchGroup)
     bpy.utils.unregister_class(FX30GrainMatchNode)
     bpy.utils.unregister_class(FX30GrainCameraSettings)
     del bpy.types.Camera.fx30_grain
+    _cached_pattern.cache_clear()
+    _gaussian_pool.cache_clear()
 
 if __name__ == "__main__":
     register()